@@ -1,6 +1,7 @@
-import time
+import math
 import utime
-from machine import I2C, Pin, PWM
+import micropython
+from machine import I2C, Pin, PWM, Timer
 
 
 _MODE_REGISTER = const(0x00)
@@ -26,6 +27,18 @@ _ENABLE_OFFSET = const(0x00)
 _BLINK_OFFSET = const(0x12)
 _COLOR_OFFSET = const(0x24)
 
+# All-on / all-off pattern for an 18-byte enable or blink plane.
+_ON18 = b'\xff' * 18
+_OFF18 = bytes(18)
+
+# LED register offset for each (x, y), indexed as x * 8 + y.
+_ADDR_LUT = bytes((17 - x) * 16 + y + 8 if x > 8 else x * 16 + 7 - y
+                  for x in range(18) for y in range(8))
+
+# Index of the lowest set bit for every 5-bit glyph row.
+_LOW_BIT = bytes(0 if v & 1 else 1 if v & 2 else 2 if v & 4 else 3 if v & 8 else 4
+                 for v in range(32))
+
 class Matrix:
     width = 17
     height = 7
@@ -33,19 +46,38 @@ class Matrix:
     def __init__(self, i2c, address=0x74):
         self.i2c = i2c
         self.address = address
+        self._current_bank = None
+        self._scratch1 = bytearray(1)
+        self._scratch2 = bytearray(2)
+        # Register address followed by payload, sent with a single writeto.
+        self._bank_buf = bytearray((_BANK_ADDRESS, 0))
+        self._fill_buf = bytearray(145)
+        self._fill_buf[0] = _COLOR_OFFSET
         self.reset()
         self.init()
 
     def _bank(self, bank=None):
         if bank is None:
             return self.i2c.readfrom_mem(self.address, _BANK_ADDRESS, 1)[0]
-        self.i2c.writeto_mem(self.address, _BANK_ADDRESS, bytearray([bank]))
+        if bank == self._current_bank:
+            return
+        self._bank_buf[1] = bank
+        self.i2c.writeto(self.address, self._bank_buf)
+        self._current_bank = bank
 
     def _register(self, bank, register, value=None):
         self._bank(bank)
         if value is None:
             return self.i2c.readfrom_mem(self.address, register, 1)[0]
-        self.i2c.writeto_mem(self.address, register, bytearray([value]))
+        self._scratch1[0] = value
+        self.i2c.writeto_mem(self.address, register, self._scratch1)
+
+    def _register2(self, bank, register, first, second):
+        # Adjacent registers in one write; the register pointer auto-increments.
+        self._bank(bank)
+        self._scratch2[0] = first
+        self._scratch2[1] = second
+        self.i2c.writeto_mem(self.address, register, self._scratch2)
 
     def _mode(self, mode=None):
         return self._register(_CONFIG_BANK, _MODE_REGISTER, mode)
@@ -55,8 +87,8 @@ class Matrix:
         self.frame(0)
         for frame in range(8):
             self.fill(0, False, frame=frame)
-            for col in range(18):
-                self._register(frame, _ENABLE_OFFSET + col, 0xff)
+            self._bank(frame)
+            self.i2c.writeto_mem(self.address, _ENABLE_OFFSET, _ON18)
         self.audio_sync(False)
 
     def reset(self):
@@ -78,28 +110,29 @@ class Matrix:
             raise ValueError("Frames out of range")
         if not 1 <= delay <= 64:
             raise ValueError("Delay out of range")
-        self._register(_CONFIG_BANK, _AUTOPLAY1_REGISTER, loops << 4 | frames)
-        self._register(_CONFIG_BANK, _AUTOPLAY2_REGISTER, delay % 64)
+        self._register2(_CONFIG_BANK, _AUTOPLAY1_REGISTER,
+                        loops << 4 | frames, delay % 64)
         self._mode(_AUTOPLAY_MODE | self._frame)
 
     def fade(self, fade_in=None, fade_out=None, pause=0):
         if fade_in is None and fade_out is None:
             self._register(_CONFIG_BANK, _BREATH2_REGISTER, 0)
+            return
         elif fade_in is None:
             fade_in = fade_out
         elif fade_out is None:
             fade_out = fade_in
         fade_in = int(math.log(fade_in / 26, 2))
         fade_out = int(math.log(fade_out / 26, 2))
-        pause = int(math.log(pause / 26, 2))
+        pause = int(math.log(pause / 26, 2)) if pause else 0
         if not 0 <= fade_in <= 7:
             raise ValueError("Fade in out of range")
         if not 0 <= fade_out <= 7:
             raise ValueError("Fade out out of range")
         if not 0 <= pause <= 7:
             raise ValueError("Pause out of range")
-        self._register(_CONFIG_BANK, _BREATH1_REGISTER, fade_out << 4 | fade_in)
-        self._register(_CONFIG_BANK, _BREATH2_REGISTER, 1 << 4 | pause)
+        self._register2(_CONFIG_BANK, _BREATH1_REGISTER,
+                        fade_out << 4 | fade_in, 1 << 4 | pause)
 
     def frame(self, frame=None, show=True):
         if frame is None:
@@ -121,12 +154,12 @@ class Matrix:
         sample_rate //= 46
         if not 1 <= sample_rate <= 256:
             raise ValueError("Sample rate out of range")
-        self._register(_CONFIG_BANK, _ADC_REGISTER, sample_rate % 256)
         audio_gain //= 3
         if not 0 <= audio_gain <= 7:
             raise ValueError("Audio gain out of range")
-        self._register(_CONFIG_BANK, _GAIN_REGISTER,
-                       bool(agc_enable) << 3 | bool(agc_fast) << 4 | audio_gain)
+        self._register2(_CONFIG_BANK, _GAIN_REGISTER,
+                        bool(agc_enable) << 3 | bool(agc_fast) << 4 | audio_gain,
+                        sample_rate % 256)
         self._mode(_AUDIOPLAY_MODE)
 
     def blink(self, rate=None):
@@ -145,14 +178,13 @@ class Matrix:
         if color is not None:
             if not 0 <= color <= 255:
                 raise ValueError("Color out of range")
-            data = bytearray([color] * 24)
-            for row in range(6):
-                self.i2c.writeto_mem(self.address,
-                                     _COLOR_OFFSET + row * 24, data)
+            data = self._fill_buf
+            for i in range(1, 145):
+                data[i] = color
+            self.i2c.writeto(self.address, data)
         if blink is not None:
-            data = bool(blink) * 0xff
-            for col in range(18):
-                self._register(frame, _BLINK_OFFSET + col, data)
+            self.i2c.writeto_mem(self.address, _BLINK_OFFSET,
+                                 _ON18 if blink else _OFF18)
 
     def write_frame(self, data, frame=None):
         if len(data) > 144:
@@ -163,132 +195,169 @@ class Matrix:
         self.i2c.writeto_mem(self.address, _COLOR_OFFSET, data)
 
     def _pixel_addr(self, x, y):
-        if x > 8:
-            x = 17 - x
-            y += 8
-        else:
-            y = 7 - y
-            
-            
-        return x * 16 + y
+        return _ADDR_LUT[x * 8 + y]
 
     def pixel(self, x, y, color=None, blink=None, frame=None):
         if not 0 <= x <= self.width:
             return
         if not 0 <= y <= self.height:
             return
-        pixel = self._pixel_addr(x, y)
-        #if color is None and blink is None:
-        #    return self._register(self._frame, pixel)
+        if color is None:
+            return
+        if not 0 <= color <= 255:
+            raise ValueError("Color out of range")
         if frame is None:
             frame = self._frame
-        if color is not None:
-            if not 0 <= color <= 255:
-                raise ValueError("Color out of range")
-            self._register(frame, _COLOR_OFFSET + pixel, color)
-        #if blink is not None:
-        #    addr, bit = divmod(pixel, 8)
-        #    bits = self._register(frame, _BLINK_OFFSET + addr)
-        #    if blink:
-        #        bits |= 1 << bit
-        #    else:
-        #        bits &= ~(1 << bit)
-        #    self._register(frame, _BLINK_OFFSET + addr, bits)
-     
+        self._register(frame, _COLOR_OFFSET + _ADDR_LUT[x * 8 + y], color)
+
+
+_WORD_STOCK = {
+    "A":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (0,3), (4,3), (0,4), (1,4), (2,4), (3,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "B":((0,0), (1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (0,3), (1,3), (2,3), (3,3), (0,4), (4,4), (0,5), (4,5), (0,6), (1,6), (2,6), (3,6)),
+    "C":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (0,3), (0,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "D":((0,0), (1,0), (2,0), (0,1), (3,1), (0,2), (4,2), (0,3), (4,3), (0,4), (4,4), (0,5), (3,5), (0,6), (1,6), (2,6)),
+    "E":((0,0), (1,0), (2,0), (3,0), (4,0), (0,1), (0,2), (0,3), (1,3), (2,3), (3,3), (0,4), (0,5), (0,6), (1,6), (2,6), (3,6), (4,6)),
+    "F":((0,0), (1,0), (2,0), (3,0), (4,0), (0,1), (0,2), (0,3), (1,3), (2,3), (0,4), (0,5), (0,6)),
+    "G":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (0,3), (0,4), (3,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "H":((0,0), (4,0), (0,1), (4,1), (0,2), (4,2), (0,3), (1,3), (2,3), (3,3), (4,3), (0,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "I":((1,0), (2,0), (3,0), (2,1), (2,2), (2,3), (2,4), (2,5), (2,6), (1,6), (2,6), (3,6)),
+    "J":((2,0), (3,0), (4,0), (3,1), (3,2), (3,3), (3,4), (0,5), (3,5), (1,6), (2,6)),
+    "K":((0,0), (4,0), (0,1), (3,1), (0,2), (2,2), (0,3), (1,3), (0,4), (2,4), (0,5), (3,5), (0,6), (4,6)),
+    "L":((0,0), (0,1), (0,2), (0,3), (0,4), (0,5), (0,6), (1,6), (2,6), (3,6), (4,6)),
+    "M":((0,0), (4,0), (0,1), (1,1), (3,1), (4,1), (0,2), (2,2), (4,2), (0,3), (4,3), (0,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "N":((0,0), (4,0), (0,1), (4,1), (0,2), (1,2), (4,2), (0,3), (2,3), (4,3), (0,4), (3,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "O":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (0,3), (4,3), (0,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "P":((0,0), (1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (0,3), (1,3), (2,3), (3,3), (0,4), (0,5), (0,6)),
+    "Q":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (0,3), (4,3), (0,4), (2,4), (4,4), (0,5), (3,5), (1,6), (2,6), (4,6)),
+    "R":((0,0), (1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (0,3), (1,3), (2,3), (3,3), (0,4), (2,4), (0,5), (3,5), (0,6), (4,6)),
+    "S":((1,0), (2,0), (3,0), (4,0), (0,1), (0,2), (1,3), (2,3), (3,3), (4,4), (4,5), (0,6), (1,6), (2,6), (3,6)),
+    "T":((0,0), (1,0), (2,0), (3,0), (4,0), (2,1), (2,2), (2,3), (2,4), (2,5), (2,6)),
+    "U":((0,0), (4,0), (0,1), (4,1), (0,2), (4,2), (0,3), (4,3), (0,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "V":((0,0), (4,0), (0,1), (4,1), (0,2), (4,2), (0,3), (4,3), (0,4), (4,4), (1,5), (3,5), (2,6)),
+    "W":((0,0), (4,0), (0,1), (4,1), (0,2), (4,2), (0,3), (2,3), (4,3), (0,4), (2,4), (4,4), (0,5), (1,5), (3,5), (4,5), (0,6), (4,6)),
+    "X":((0,0), (4,0), (0,1), (4,1), (1,2), (3,2), (2,3), (1,4), (3,4), (0,5), (4,5), (0,6), (4,6)),
+    "Y":((0,0), (4,0), (0,1), (4,1), (1,2), (3,2), (2,3), (2,4), (2,5), (2,6)),
+    "Z":((0,0), (1,0), (2,0), (3,0), (4,0), (4,1), (3,2), (2,3), (1,4), (0,5), (0,6), (1,6), (2,6), (3,6), (4,6)),
+    "a":((1,2), (2,2), (3,2), (4,3), (1,4), (2,4), (3,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6), (4,6)),
+    "b":((0,0), (0,1), (0,2), (2,2), (3,2), (0,3), (1,3), (4,3), (0,4), (4,4), (0,5), (4,5), (0,6), (1,6), (2,6), (3,6)),
+    "c":((1,2), (2,2), (3,2), (0,3), (0,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "d":((4,0), (4,1), (1,2), (2,2), (4,2), (0,3), (3,3), (4,3), (0,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6), (4,6)),
+    "e":((1,2), (2,2), (3,2), (0,3), (4,3), (0,4), (1,4), (2,4), (3,4), (4,4), (0,5), (1,6), (2,6), (3,6)),    
+    "f":((2,0), (3,0), (1,1), (4,1), (1,2), (0,3), (1,3), (2,3), (1,4), (1,5), (1,6)),
+    "g":((1,2), (2,2), (3,2), (4,2), (0,3), (4,3), (1,4), (2,4), (3,4), (4,4), (4,5), (2,6), (3,6)),
+    "h":((0,0), (0,1), (0,2), (2,2), (3,2), (0,3), (1,3), (4,3), (0,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "i":((2,0), (1,2), (2,2), (2,3), (2,4), (2,5), (1,6), (2,6), (3,6)),
+    "j":((3,0), (2,2), (3,2), (3,3), (3,4), (0,5), (3,5), (1,6), (2,6)),
+    "k":((1,0), (1,1), (1,2), (4,2), (1,3), (3,3), (1,4), (2,4), (1,5), (3,5), (1,6), (4,6)),
+    "l":((1,0), (2,0), (2,1), (2,2), (2,3), (2,4), (2,5), (1,6), (2,6), (3,6)),
+    "m":((0,2), (1,2), (3,2), (0,3), (2,3), (4,3), (0,4), (2,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "n":((0,2), (2,2), (3,2), (0,3), (1,3), (4,3), (0,4), (4,4), (0,5), (4,5), (0,6), (4,6)),
+    "o":((1,2), (2,2), (3,2), (0,3), (4,3), (0,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "p":((0,2), (1,2), (2,2), (3,2), (0,3), (4,3), (0,4), (1,4), (2,4), (3,4), (0,5), (0,6)),
+    "q":((1,2), (2,2), (4,2), (0,3), (3,3), (4,3), (1,4), (2,4), (3,4), (4,4), (4,5), (4,6)),
+    "r":((0,2), (2,2), (3,2), (0,3), (1,3), (4,3), (0,4), (0,5), (0,6)),
+    "s":((1,2), (2,2), (3,2), (0,3), (1,4), (2,4), (3,4), (4,5), (0,6), (1,6), (2,6), (3,6)),
+    "t":((1,0), (1,1), (0,2), (1,2), (2,2), (1,3), (1,4), (1,5), (4,5), (2,6), (3,6)),
+    "u":((0,2), (4,2), (0,3), (4,3), (0,4), (4,4), (0,5), (3,5), (4,5), (1,6), (2,6), (4,6)),
+    "v":((0,2), (4,2), (0,3), (4,3), (0,4), (4,4), (1,5), (3,5), (2,6)),
+    "w":((0,2), (4,2), (0,3), (4,3), (0,4), (2,4), (4,4), (0,5), (2,5), (4,5), (1,6), (3,6)),
+    "x":((0,2), (4,2), (1,3), (3,3), (2,4), (1,5), (3,5), (0,6), (4,6)),
+    "y":((0,2), (4,2), (0,3), (4,3), (1,4), (2,4), (3,4), (4,4), (4,5), (1,6), (2,6), (3,6)),
+    "z":((0,2), (1,2), (2,2), (3,2), (4,2), (3,3), (2,4), (1,5), (0,6), (1,6), (2,6), (3,6), (4,6)),
+    " ":(),
+    "0":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (3,2), (4,2), (0,3), (2,3), (4,3), (0,4), (1,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "1":((2,0), (1,1), (2,1), (2,2), (2,3), (2,4), (2,5), (1,6), (2,6), (3,6)),
+    "2":((1,0), (2,0), (3,0), (0,1), (4,1), (4,2), (3,3), (2,4), (1,5), (0,6), (1,6), (2,6), (3,6), (4,6)),
+    "3":((0,0), (1,0), (2,0), (3,0), (4,0), (3,1), (2,2), (3,3), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "4":((3,0), (2,1), (3,1), (1,2), (3,2), (0,3), (3,3), (0,4), (1,4), (2,4), (3,4), (4,4), (3,5), (3,6)),
+    "5":((0,0), (1,0), (2,0), (3,0), (4,0), (0,1), (0,2), (1,2), (2,2), (3,2), (4,3), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "6":((2,0), (3,0), (1,1), (0,2), (0,3), (1,3), (2,3), (3,3), (0,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "7":((0,0), (1,0), (2,0), (3,0), (4,0), (4,1), (3,2), (2,3), (1,4), (1,5), (1,6)),
+    "8":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (1,3), (2,3), (3,3), (0,4), (4,4), (0,5), (4,5), (1,6), (2,6), (3,6)),
+    "9":((1,0), (2,0), (3,0), (0,1), (4,1), (0,2), (4,2), (1,3), (2,3), (3,3), (4,3), (4,4), (3,5), (1,6), (2,6))
+}
+# One byte per row, bit n set when column n is lit.
+# Bits are OR'ed in, so a point listed twice (e.g. in "I") is still one pixel.
+_GLYPHS = {}
+for _c, _pts in _WORD_STOCK.items():
+    _rows = bytearray(7)
+    for _x, _y in _pts:
+        _rows[_y] |= 1 << _x
+    _GLYPHS[_c] = bytes(_rows)
+del _WORD_STOCK, _c, _pts, _rows, _x, _y
+
+
+@micropython.viper
+def _raster(fb: ptr8, lut: ptr8, low: ptr8, glyph: ptr8, base_x: int, color: int):
+    # Plot one packed glyph with its left edge at base_x, clipped to x 0..16.
+    for row in range(7):
+        bits = int(glyph[row])
+        while bits:
+            x = base_x + int(low[bits])
+            if x > 16:
+                break
+            if x >= 0:
+                fb[lut[x * 8 + row]] = color
+            bits &= bits - 1
+
+
+@micropython.viper
+def _clear(fb: ptr8):
+    for i in range(144):
+        fb[i] = 0
 
 
 class Display(Matrix):
+    glyphs = _GLYPHS
+
     def __init__(self, i2c, address=0x74):
         super().__init__(i2c, address=0x74)
-        
-        self.wordStock = {
-            "A":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [0,3], [4,3], [0,4], [1,4], [2,4], [3,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "B":[[0,0], [1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [0,3], [1,3], [2,3], [3,3], [0,4], [4,4], [0,5], [4,5], [0,6], [1,6], [2,6], [3,6]],
-            "C":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [0,3], [0,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "D":[[0,0], [1,0], [2,0], [0,1], [3,1], [0,2], [4,2], [0,3], [4,3], [0,4], [4,4], [0,5], [3,5], [0,6], [1,6], [2,6]],
-            "E":[[0,0], [1,0], [2,0], [3,0], [4,0], [0,1], [0,2], [0,3], [1,3], [2,3], [3,3], [0,4], [0,5], [0,6], [1,6], [2,6], [3,6], [4,6]],
-            "F":[[0,0], [1,0], [2,0], [3,0], [4,0], [0,1], [0,2], [0,3], [1,3], [2,3], [0,4], [0,5], [0,6]],
-            "G":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [0,3], [0,4], [3,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "H":[[0,0], [4,0], [0,1], [4,1], [0,2], [4,2], [0,3], [1,3], [2,3], [3,3], [4,3], [0,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "I":[[1,0], [2,0], [3,0], [2,1], [2,2], [2,3], [2,4], [2,5], [2,6], [1,6], [2,6], [3,6]],
-            "J":[[2,0], [3,0], [4,0], [3,1], [3,2], [3,3], [3,4], [0,5], [3,5], [1,6], [2,6]],
-            "K":[[0,0], [4,0], [0,1], [3,1], [0,2], [2,2], [0,3], [1,3], [0,4], [2,4], [0,5], [3,5], [0,6], [4,6]],
-            "L":[[0,0], [0,1], [0,2], [0,3], [0,4], [0,5], [0,6], [1,6], [2,6], [3,6], [4,6]],
-            "M":[[0,0], [4,0], [0,1], [1,1], [3,1], [4,1], [0,2], [2,2], [4,2], [0,3], [4,3], [0,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "N":[[0,0], [4,0], [0,1], [4,1], [0,2], [1,2], [4,2], [0,3], [2,3], [4,3], [0,4], [3,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "O":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [0,3], [4,3], [0,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "P":[[0,0], [1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [0,3], [1,3], [2,3], [3,3], [0,4], [0,5], [0,6]],
-            "Q":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [0,3], [4,3], [0,4], [2,4], [4,4], [0,5], [3,5], [1,6], [2,6], [4,6]],
-            "R":[[0,0], [1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [0,3], [1,3], [2,3], [3,3], [0,4], [2,4], [0,5], [3,5], [0,6], [4,6]],
-            "S":[[1,0], [2,0], [3,0], [4,0], [0,1], [0,2], [1,3], [2,3], [3,3], [4,4], [4,5], [0,6], [1,6], [2,6], [3,6]],
-            "T":[[0,0], [1,0], [2,0], [3,0], [4,0], [2,1], [2,2], [2,3], [2,4], [2,5], [2,6]],
-            "U":[[0,0], [4,0], [0,1], [4,1], [0,2], [4,2], [0,3], [4,3], [0,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "V":[[0,0], [4,0], [0,1], [4,1], [0,2], [4,2], [0,3], [4,3], [0,4], [4,4], [1,5], [3,5], [2,6]],
-            "W":[[0,0], [4,0], [0,1], [4,1], [0,2], [4,2], [0,3], [2,3], [4,3], [0,4], [2,4], [4,4], [0,5], [1,5], [3,5], [4,5], [0,6], [4,6]],
-            "X":[[0,0], [4,0], [0,1], [4,1], [1,2], [3,2], [2,3], [1,4], [3,4], [0,5], [4,5], [0,6], [4,6]],
-            "Y":[[0,0], [4,0], [0,1], [4,1], [1,2], [3,2], [2,3], [2,4], [2,5], [2,6]],
-            "Z":[[0,0], [1,0], [2,0], [3,0], [4,0], [4,1], [3,2], [2,3], [1,4], [0,5], [0,6], [1,6], [2,6], [3,6], [4,6]],
-            "a":[[1,2], [2,2], [3,2], [4,3], [1,4], [2,4], [3,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6], [4,6]],
-            "b":[[0,0], [0,1], [0,2], [2,2], [3,2], [0,3], [1,3], [4,3], [0,4], [4,4], [0,5], [4,5], [0,6], [1,6], [2,6], [3,6]],
-            "c":[[1,2], [2,2], [3,2], [0,3], [0,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "d":[[4,0], [4,1], [1,2], [2,2], [4,2], [0,3], [3,3], [4,3], [0,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6], [4,6]],
-            "e":[[1,2], [2,2], [3,2], [0,3], [4,3], [0,4], [1,4], [2,4], [3,4], [4,4], [0,5], [1,6], [2,6], [3,6]],    
-            "f":[[2,0], [3,0], [1,1], [4,1], [1,2], [0,3], [1,3], [2,3], [1,4], [1,5], [1,6]],
-            "g":[[1,2], [2,2], [3,2], [4,2], [0,3], [4,3], [1,4], [2,4], [3,4], [4,4], [4,5], [2,6], [3,6]],
-            "h":[[0,0], [0,1], [0,2], [2,2], [3,2], [0,3], [1,3], [4,3], [0,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "i":[[2,0], [1,2], [2,2], [2,3], [2,4], [2,5], [1,6], [2,6], [3,6]],
-            "j":[[3,0], [2,2], [3,2], [3,3], [3,4], [0,5], [3,5], [1,6], [2,6]],
-            "k":[[1,0], [1,1], [1,2], [4,2], [1,3], [3,3], [1,4], [2,4], [1,5], [3,5], [1,6], [4,6]],
-            "l":[[1,0], [2,0], [2,1], [2,2], [2,3], [2,4], [2,5], [1,6], [2,6], [3,6]],
-            "m":[[0,2], [1,2], [3,2], [0,3], [2,3], [4,3], [0,4], [2,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "n":[[0,2], [2,2], [3,2], [0,3], [1,3], [4,3], [0,4], [4,4], [0,5], [4,5], [0,6], [4,6]],
-            "o":[[1,2], [2,2], [3,2], [0,3], [4,3], [0,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "p":[[0,2], [1,2], [2,2], [3,2], [0,3], [4,3], [0,4], [1,4], [2,4], [3,4], [0,5], [0,6]],
-            "q":[[1,2], [2,2], [4,2], [0,3], [3,3], [4,3], [1,4], [2,4], [3,4], [4,4], [4,5], [4,6]],
-            "r":[[0,2], [2,2], [3,2], [0,3], [1,3], [4,3], [0,4], [0,5], [0,6]],
-            "s":[[1,2], [2,2], [3,2], [0,3], [1,4], [2,4], [3,4], [4,5], [0,6], [1,6], [2,6], [3,6]],
-            "t":[[1,0], [1,1], [0,2], [1,2], [2,2], [1,3], [1,4], [1,5], [4,5], [2,6], [3,6]],
-            "u":[[0,2], [4,2], [0,3], [4,3], [0,4], [4,4], [0,5], [3,5], [4,5], [1,6], [2,6], [4,6]],
-            "v":[[0,2], [4,2], [0,3], [4,3], [0,4], [4,4], [1,5], [3,5], [2,6]],
-            "w":[[0,2], [4,2], [0,3], [4,3], [0,4], [2,4], [4,4], [0,5], [2,5], [4,5], [1,6], [3,6]],
-            "x":[[0,2], [4,2], [1,3], [3,3], [2,4], [1,5], [3,5], [0,6], [4,6]],
-            "y":[[0,2], [4,2], [0,3], [4,3], [1,4], [2,4], [3,4], [4,4], [4,5], [1,6], [2,6], [3,6]],
-            "z":[[0,2], [1,2], [2,2], [3,2], [4,2], [3,3], [2,4], [1,5], [0,6], [1,6], [2,6], [3,6], [4,6]],
-            " ":[],
-            "0":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [3,2], [4,2], [0,3], [2,3], [4,3], [0,4], [1,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "1":[[2,0], [1,1], [2,1], [2,2], [2,3], [2,4], [2,5], [1,6], [2,6], [3,6]],
-            "2":[[1,0], [2,0], [3,0], [0,1], [4,1], [4,2], [3,3], [2,4], [1,5], [0,6], [1,6], [2,6], [3,6], [4,6]],
-            "3":[[0,0], [1,0], [2,0], [3,0], [4,0], [3,1], [2,2], [3,3], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "4":[[3,0], [2,1], [3,1], [1,2], [3,2], [0,3], [3,3], [0,4], [1,4], [2,4], [3,4], [4,4], [3,5], [3,6]],
-            "5":[[0,0], [1,0], [2,0], [3,0], [4,0], [0,1], [0,2], [1,2], [2,2], [3,2], [4,3], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "6":[[2,0], [3,0], [1,1], [0,2], [0,3], [1,3], [2,3], [3,3], [0,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "7":[[0,0], [1,0], [2,0], [3,0], [4,0], [4,1], [3,2], [2,3], [1,4], [1,5], [1,6]],
-            "8":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [1,3], [2,3], [3,3], [0,4], [4,4], [0,5], [4,5], [1,6], [2,6], [3,6]],
-            "9":[[1,0], [2,0], [3,0], [0,1], [4,1], [0,2], [4,2], [1,3], [2,3], [3,3], [4,3], [4,4], [3,5], [1,6], [2,6]]
-                }
-        
-        
-        
+        # Frames are rendered into _fb, a view of Matrix's _fill_buf after
+        # its register byte, and sent in one burst by _flip.
+        self._fb = memoryview(self._fill_buf)[1:]
+        # show() draws into the hidden frame, then makes it the visible one.
+        self._show_frame = 0
+        self._draw_frame = 1
+
+    def _flip(self):
+        draw = self._draw_frame
+        self._bank(draw)
+        self.i2c.writeto(self.address, self._fill_buf)
+        self.frame(draw)
+        self._draw_frame = self._show_frame
+        self._show_frame = draw
+
     def show(self, string_list):
-        self.fill(0)
+        fb = self._fb
+        clear = _clear
+        lut = _ADDR_LUT
+        low = _LOW_BIT
+        raster = _raster
+        flush = self._flip
         strlist = str(string_list)
-        if (len(strlist)<4):
-            for strcount in range(len(strlist)):
-                for a in range(len(self.wordStock[strlist[strcount]])):
-                    self.pixel(self.wordStock[strlist[strcount]][a][0]+strcount*6, self.wordStock[strlist[strcount]][a][1], 10)   
-        if (len(strlist) >3):
-            for offset in range(0, -6*len(strlist), -1):
-                for strcount in range(len(strlist)):
-                    skewing = strcount*6+offset
-                    for strNum in range(len(self.wordStock[strlist[strcount]])):
-                        if self.wordStock[strlist[strcount]][strNum][0]+skewing >= 0:
-                            self.pixel(self.wordStock[strlist[strcount]][strNum][0]+skewing, self.wordStock[strlist[strcount]][strNum][1], 20)
-                        else:
-                            pass
-                time.sleep(0.05)    
-                self.fill(0)
-                
-                
+        glyphs = [self.glyphs[c] for c in strlist]
+        n = len(glyphs)
+        clear(fb)
+        if (n<4):
+            for strcount in range(n):
+                raster(fb, lut, low, glyphs[strcount], strcount*6, 10)
+            flush()
+        if (n >3):
+            next_tick = utime.ticks_ms()
+            for offset in range(0, -6*n, -1):
+                # Only characters overlapping columns 0..16 are drawn.
+                first = max(0, (1 - offset) // 6)
+                last = min(n, (16 - offset) // 6 + 1)
+                for strcount in range(first, last):
+                    raster(fb, lut, low, glyphs[strcount], strcount*6+offset, 20)
+                flush()
+                # Hold each frame until 50 ms after the previous one.
+                next_tick = utime.ticks_add(next_tick, 50)
+                d = utime.ticks_diff(next_tick, utime.ticks_ms())
+                if d > 0:
+                    utime.sleep_ms(d)
+                clear(fb)
+            flush()
 
 
 class Button():
@@ -297,13 +366,16 @@ class Button():
             self.keyname = 20
         if keyname == "B":
             self.keyname = 21
+        self._pin = None  # 首次检测时才配置引脚
         
     def is_pressed(self):
-        button = Pin(self.keyname, Pin.IN)
-        if button.value() == 0:
-            time.sleep(0.13)
-            if button.value() == 0:
-                return 1
+        button = self._pin
+        if button is None:
+            button = self._pin = Pin(self.keyname, Pin.IN, Pin.PULL_UP)
+        if button.value():
+            return 0
+        utime.sleep_ms(130)
+        return 1 if button.value() == 0 else 0
             
             
             
@@ -311,7 +383,6 @@ class Led():
     def __init__(self):
         self.ledpin = 25
         self.led = Pin(self.ledpin, Pin.OUT)
-        self.tones = {'1': 262, '2': 294, '3': 330, '4': 349, '5': 392, '6': 440, '7': 494, '-': 0}
         
     def on(self):
         self.led.value(1)
@@ -325,19 +396,56 @@ class Music():
     def __init__(self):
         self.tones = {'1': 262, '2': 294, '3': 330, '4': 349, '5': 392, '6': 440, '7': 494, '-': 0}
         self.buzzer = PWM(Pin(0))
+        self._timer = Timer()
+        self._freqs = []
+        self._tick = 0
         
-    def phonate(self,melody):
-        for tone in melody:
-            freq = self.tones[tone]
+    def phonate(self, melody, wait=True):
+        self.stop()
+        freqs = [self.tones.get(tone, 0) for tone in melody]  # 未知音符按空拍处理
+        if not wait:
+            if not freqs:
+                return
+            # 后台播放：定时器每100ms走一步，每个音占5步（响400ms，停100ms）
+            self._freqs = freqs
+            self._tick = 0
+            self._step(self._timer)
+            self._timer.init(mode=Timer.PERIODIC, period=100, callback=self._step)
+            return
+        buzzer = self.buzzer
+        for freq in freqs:
             if freq:
-                self.buzzer.duty_u16(1000) # 调整PWM的频率，使其发出指定的音调
-                self.buzzer.freq(freq)
+                buzzer.freq(freq) # 调整PWM的频率，使其发出指定的音调
+                buzzer.duty_u16(1000)
             else:
-                self.buzzer.duty_u16(0)  # 空拍时一样不上电
+                buzzer.duty_u16(0)  # 空拍时一样不上电
             # 停顿一下 （四四拍每秒两个音，每个音节中间稍微停顿一下）
             utime.sleep_ms(400)
-            self.buzzer.duty_u16(0)  # 设备占空比为0，即不上电
+            buzzer.duty_u16(0)  # 设备占空比为0，即不上电
             utime.sleep_ms(100)
+
+    def _step(self, timer):
+        note, phase = divmod(self._tick, 5)
+        if note >= len(self._freqs):
+            timer.deinit()
+            return
+        if phase == 0:
+            freq = self._freqs[note]
+            if freq:
+                self.buzzer.freq(freq)
+                self.buzzer.duty_u16(1000)
+            else:
+                self.buzzer.duty_u16(0)
+        elif phase == 4:
+            self.buzzer.duty_u16(0)
+        self._tick += 1
+
+    def stop(self):
+        self._timer.deinit()
+        self.buzzer.duty_u16(0)
+
+    def close(self):
+        self.stop()
         self.buzzer.deinit()  # 释放PWM
 
 class PinEFencoding:
@@ -361,10 +469,28 @@ class PinEFencoding:
         self.P16 = 16
 
 
+class _Lazy:
+    # Builds the wrapped object on first attribute access, so importing the
+    # module does not reset the LED matrix, claim the buzzer or drive the
+    # LED pin until they are used. The proxy is not an instance of the
+    # wrapped class, so isinstance() checks on it fail.
+    def __init__(self, factory):
+        self._factory = factory
+        self._obj = None
+
+    def _get(self):
+        if self._obj is None:
+            self._obj = self._factory()
+        return self._obj
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
 pin=PinEFencoding()
 ButtonA = Button("A")
 ButtonB = Button("B")
-led = Led()
+led = _Lazy(Led)
 i2c = I2C(1,scl=Pin(19),sda=Pin(18))
-display = Display(i2c)
-music = Music()
+display = _Lazy(lambda: Display(i2c))
+music = _Lazy(Music)